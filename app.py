@@ -6,6 +6,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from evaluator.workflows import *
 from evaluator.evaluate_resume import evaluate_resume_file
 from database.db import *   # keeps your existing DB helpers (init_db, create_batch, add_file, set_file_done, set_file_error, get_batch_progress)
+from database.storage import store_upload, write_result_json, read_result_json, read_result_text, find_result_path, norm_path, list_result_files, result_stem
 
 # --- filesystem setup ---
 UPLOAD_DIR = Path("uploads")
@@ -89,19 +90,19 @@ def read_result_json_for_file(file_id):
             r = cur.fetchone()
             con.close()
             if r and r[0]:
-                p = Path(r[0])
+                p = norm_path(r[0])
                 if p.exists():
-                    return json.loads(p.read_text(encoding="utf-8"))
+                    return read_result_json(p)
     except Exception:
         pass
 
-    # fallback to results folder file
-    p = RESULTS_DIR / f"{file_id}.json"
-    if p.exists():
+    # fallback to results folder file (compressed or legacy plain JSON)
+    p = find_result_path(file_id)
+    if p:
         try:
-            return json.loads(p.read_text(encoding="utf-8"))
+            return read_result_json(p)
         except Exception:
-            return {"_raw": p.read_text(encoding="utf-8")}
+            return {"_raw": read_result_text(p)}
     # if error json exists
     p2 = RESULTS_DIR / f"{file_id}_error.json"
     if p2.exists():
@@ -147,10 +148,8 @@ if page == "Evaluate":
                     data = f.read()
                     checksum = hashlib.sha256(data).hexdigest()
                     file_id = str(uuid.uuid4())
-                    dest_dir = UPLOAD_DIR / batch_id
-                    dest_dir.mkdir(parents=True, exist_ok=True)
-                    path = dest_dir / f"{file_id}_{f.name}"
-                    path.write_bytes(data)
+                    # content-addressed: identical uploads share one blob
+                    path = store_upload(data, checksum, f.name)
                     add_file(file_id, batch_id, f.name, str(path), checksum)
                     file_entries.append((file_id, str(path)))
 
@@ -181,10 +180,8 @@ if page == "Evaluate":
                             # Call your evaluator (synchronous). It should return a JSON-serializable dict
                             result = evaluate_resume_file(file_path, job_description)
 
-                            # Save per-file JSON result immediately
-                            result_path = RESULTS_DIR / f"{file_id}.json"
-                            with open(result_path, "w", encoding="utf-8") as fh:
-                                json.dump(result, fh, ensure_ascii=False, indent=2)
+                            # Save per-file JSON result immediately (gzip'd, compact)
+                            result_path = write_result_json(file_id, result)
 
                             # mark DB (if function available)
                             try:
@@ -256,10 +253,10 @@ if page == "Evaluate":
                 # status_txt.write(feedback)
 
                 # Show result links (unchanged)
-                st.write("Results folder: `results/` — one JSON per file.")
+                st.write("Results folder: `results/` — one gzip'd JSON per file.")
                 for file_id, _ in file_entries:
-                    p = RESULTS_DIR / f"{file_id}.json"
-                    if p.exists():
+                    p = find_result_path(file_id)
+                    if p:
                         st.markdown(f"- `{p.name}`")
 
 # --- RESULTS PAGE ---
@@ -342,20 +339,21 @@ else:
     batches = query_batches_from_db()
     if not batches:
         st.info("No batches found in DB. Falling back to scanning results folder.")
-        files = sorted(list(RESULTS_DIR.glob("*.json")), key=lambda p: p.stat().st_mtime, reverse=True)
+        files = sorted(list_result_files(), key=lambda p: p.stat().st_mtime, reverse=True)
         if not files:
             st.write("No results found.")
         else:
             # build preview rows from results folder (no DB metadata available)
             rows = []
             for p in files:
+                data, raw = None, None
                 try:
-                    data = json.loads(p.read_text(encoding="utf-8"))
+                    data = read_result_json(p)
                 except Exception:
-                    data = {"_raw": p.read_text(encoding="utf-8")}
+                    raw = read_result_text(p)
                 preview = extract_preview_from_json(data)
-                display_name = p.name.replace(".json", "")
-                rows.append({"display_name": display_name, **preview, "path": p})
+                display_name = result_stem(p)
+                rows.append({"display_name": display_name, **preview, "path": p, "data": data, "raw": raw})
             # show simplified table (no IDs)
             table_rows = [{"file": r["display_name"], "candidate": r["name"] or "—", "match": r["match"] or "—", "experience": r["experience"] or "—"} for r in rows]
             st.table(table_rows)
@@ -368,13 +366,13 @@ else:
                     st.markdown("**Top skills:**")
                     st.write(r["skills"] or "—")
                     st.subheader("Full result JSON")
-                    try:
-                        data = json.loads(r["path"].read_text(encoding="utf-8"))
+                    if r["raw"] is not None:
+                        st.text(r["raw"])
+                    else:
+                        data = r["data"]
                         st.json(data)
                         download_name = f"{r['display_name']}_result.json"
                         st.download_button("Download result JSON", data=json.dumps(data, ensure_ascii=False, indent=2), file_name=download_name)
-                    except Exception:
-                        st.text(r["path"].read_text(encoding="utf-8"))
     else:
         # Build a friendly label -> id map so we never show raw UUIDs
         batch_labels = []
@@ -64,3 +64,23 @@ def get_batch_progress(batch_id):
     if r:
         return {"total": r[0], "completed": r[1], "status": r[2]}
     return None
+
+def get_file_refs():
+    conn = sqlite3.connect(DB)
+    c = conn.cursor()
+    c.execute("SELECT id, path, checksum, result_path FROM files")
+    rows = c.fetchall()
+    conn.close()
+    return [{"id": r[0], "path": r[1], "checksum": r[2], "result_path": r[3]} for r in rows]
+
+def set_file_path(file_id, path):
+    conn = sqlite3.connect(DB)
+    c = conn.cursor()
+    c.execute("UPDATE files SET path=? WHERE id=?", (path, file_id))
+    conn.commit(); conn.close()
+
+def set_result_path(file_id, result_path):
+    conn = sqlite3.connect(DB)
+    c = conn.cursor()
+    c.execute("UPDATE files SET result_path=? WHERE id=?", (result_path, file_id))
+    conn.commit(); conn.close()
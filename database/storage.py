@@ -0,0 +1,240 @@
+# storage.py
+# Content-addressed uploads, compressed results and orphan GC.
+#
+#   uploads/blobs/<sha256[:2]>/<sha256><ext>   one copy per distinct upload
+#   results/<file_id>.json.gz                   compact gzip'd result JSON
+#
+# Run `python -m database.storage` to migrate legacy files, GC orphans and
+# print a before/after report.
+import gzip, json, os, time, uuid
+from pathlib import Path
+
+from .db import get_file_refs, set_file_path, set_result_path
+
+UPLOAD_DIR = Path("uploads")
+RESULTS_DIR = Path("results")
+BLOB_DIR = UPLOAD_DIR / "blobs"
+RESULT_SUFFIX = ".json.gz"
+# files younger than this are never GC'd: an upload is written before its row is added
+GC_GRACE_SECONDS = 3600
+
+
+def norm_path(p):
+    # DB rows written on Windows store backslash-separated paths
+    return Path(str(p).replace("\\", "/")) if p else None
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def blob_path(checksum, filename=""):
+    return BLOB_DIR / checksum[:2] / f"{checksum}{Path(filename).suffix.lower()}"
+
+def store_upload(data, checksum, filename):
+    """Store upload bytes once per checksum and return the blob path."""
+    path = blob_path(checksum, filename)
+    if not path.exists():
+        _atomic_write(path, data)
+    return path
+
+def result_path_for(file_id):
+    return RESULTS_DIR / f"{file_id}{RESULT_SUFFIX}"
+
+def write_result_json(file_id, result):
+    """Write a result as compact gzip'd JSON and return its path."""
+    path = result_path_for(file_id)
+    raw = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    _atomic_write(path, gzip.compress(raw, compresslevel=6))
+    return path
+
+def read_result_text(path):
+    """Read a result file as text, whether gzip'd or plain JSON."""
+    path = norm_path(path)
+    data = path.read_bytes()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+def read_result_json(path):
+    return json.loads(read_result_text(path))
+
+def find_result_path(file_id):
+    """Locate the result for file_id, preferring the compressed form."""
+    for p in (result_path_for(file_id), RESULTS_DIR / f"{file_id}.json"):
+        if p.exists():
+            return p
+    return None
+
+def list_result_files():
+    """All result files (compressed and legacy plain), excluding error dumps."""
+    files = list(RESULTS_DIR.glob(f"*{RESULT_SUFFIX}")) + list(RESULTS_DIR.glob("*.json"))
+    return [p for p in files if not p.name.split(".")[0].endswith("_error")]
+
+def result_stem(path):
+    # "<file_id>.json.gz" / "<file_id>.json" -> "<file_id>"
+    return Path(path).name.split(".")[0]
+
+
+# --- compaction / retention ---
+def _dir_bytes(root):
+    return sum(p.stat().st_size for p in Path(root).rglob("*") if p.is_file())
+
+def _scan_results_seconds():
+    # mirrors the Results page fallback: list, then load every result
+    start = time.perf_counter()
+    for p in list_result_files():
+        try:
+            read_result_json(p)
+        except Exception:
+            pass
+    return time.perf_counter() - start
+
+def compact_uploads(refs, skip, dry_run=False):
+    """Move legacy per-batch uploads into the blob store and repoint rows at it.
+
+    Pass 1 makes sure each checksum has a blob; pass 2 repoints every row whose
+    blob exists, so a row whose own legacy file is gone still gets repointed.
+    Moved sources are added to `skip` so a dry-run GC doesn't count them.
+    """
+    blobs = set()
+    for r in refs:
+        src = norm_path(r["path"])
+        if not r["checksum"] or src is None:
+            continue
+        dest = blob_path(r["checksum"], src.name)
+        if dest in blobs or dest.exists():
+            blobs.add(dest)
+            continue
+        if src == dest or not src.exists():
+            continue
+        if not dry_run:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(src, dest)
+        skip.add(src)
+        blobs.add(dest)
+
+    repointed = 0
+    for r in refs:
+        src = norm_path(r["path"])
+        if not r["checksum"] or src is None:
+            continue
+        dest = blob_path(r["checksum"], src.name)
+        if src == dest or dest not in blobs:
+            continue
+        if not dry_run:
+            set_file_path(r["id"], str(dest))
+        r["path"] = str(dest)
+        repointed += 1
+    return repointed
+
+def compact_results(refs, skip, dry_run=False):
+    """Gzip plain result JSON of live files and repoint DB rows at the compressed copy.
+
+    Results whose id has no `files` row are left for GC. Returns (count, bytes saved).
+    """
+    by_id = {r["id"]: r for r in refs}
+    compacted, saved = 0, 0
+    for p in list(RESULTS_DIR.glob("*.json")):
+        file_id = result_stem(p)
+        if file_id.endswith("_error") or file_id not in by_id:
+            continue
+        try:
+            data = read_result_json(p)
+        except Exception:
+            continue
+        new_path = result_path_for(file_id)
+        saved += p.stat().st_size + (new_path.stat().st_size if new_path.exists() else 0)
+        if dry_run:
+            raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            saved -= len(gzip.compress(raw, compresslevel=6))
+        else:
+            write_result_json(file_id, data)
+            saved -= new_path.stat().st_size
+            p.unlink()
+        skip.add(p)
+        r = by_id[file_id]
+        if r["result_path"]:
+            if not dry_run:
+                set_result_path(file_id, str(new_path))
+            r["result_path"] = str(new_path)
+        compacted += 1
+    return compacted, saved
+
+def gc_orphans(refs, skip=(), grace_seconds=GC_GRACE_SECONDS, dry_run=False):
+    """Delete uploads/results not referenced by any `files` row. Returns (count, bytes)."""
+    ids = {r["id"] for r in refs}
+    keep = {norm_path(r["path"]).resolve() for r in refs if r["path"]}
+    keep |= {norm_path(r["result_path"]).resolve() for r in refs if r["result_path"]}
+    skip = {Path(p).resolve() for p in skip}
+    cutoff = time.time() - grace_seconds
+    removed, reclaimed = 0, 0
+
+    candidates = [p for p in UPLOAD_DIR.rglob("*") if p.is_file()] if UPLOAD_DIR.exists() else []
+    candidates += [p for p in RESULTS_DIR.iterdir() if p.is_file()] if RESULTS_DIR.exists() else []
+    for p in candidates:
+        if p.resolve() in keep or p.resolve() in skip:
+            continue
+        stem = result_stem(p)
+        if p.parent == RESULTS_DIR and stem.removesuffix("_error") in ids:
+            continue
+        st = p.stat()
+        if st.st_mtime > cutoff:
+            continue
+        if not dry_run:
+            p.unlink()
+        removed += 1
+        reclaimed += st.st_size
+
+    if not dry_run and UPLOAD_DIR.exists():
+        # drop now-empty legacy uploads/<batch_id>/ folders; blob shards are left
+        # alone so a concurrent store_upload never loses its directory
+        for d in UPLOAD_DIR.iterdir():
+            if d.is_dir() and d != BLOB_DIR and not any(d.iterdir()):
+                d.rmdir()
+    return removed, reclaimed
+
+def run_maintenance(grace_seconds=GC_GRACE_SECONDS, dry_run=False):
+    """Compact uploads and results, GC orphans, and report bytes and scan time before/after.
+
+    A dry run changes nothing on disk or in the DB; its `bytes_reclaimed` is the
+    figure a real run would report.
+    """
+    bytes_before = _dir_bytes(UPLOAD_DIR) + _dir_bytes(RESULTS_DIR)
+    scan_before = _scan_results_seconds()
+
+    refs = get_file_refs()
+    skip = set()
+    uploads_repointed = compact_uploads(refs, skip, dry_run)
+    results_compacted, compact_bytes = compact_results(refs, skip, dry_run)
+    orphans_removed, orphan_bytes = gc_orphans(refs, skip, grace_seconds, dry_run)
+
+    bytes_after = _dir_bytes(UPLOAD_DIR) + _dir_bytes(RESULTS_DIR)
+    if dry_run:
+        bytes_after = bytes_before - compact_bytes - orphan_bytes
+    scan_after = _scan_results_seconds()
+    return {
+        "dry_run": dry_run,
+        "uploads_deduplicated": uploads_repointed,
+        "results_compacted": results_compacted,
+        "compaction_bytes": compact_bytes,
+        "orphans_removed": orphans_removed,
+        "orphan_bytes": orphan_bytes,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_reclaimed": bytes_before - bytes_after,
+        "scan_seconds_before": round(scan_before, 4),
+        "scan_seconds_after": round(scan_after, 4),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    from .db import init_db
+
+    ap = argparse.ArgumentParser(description="Compact and garbage-collect uploads/ and results/.")
+    ap.add_argument("--dry-run", action="store_true", help="report what a real run would do without changing anything")
+    ap.add_argument("--grace", type=int, default=GC_GRACE_SECONDS, help="skip files modified within this many seconds")
+    args = ap.parse_args()
+    init_db()
+    print(json.dumps(run_maintenance(args.grace, args.dry_run), indent=2))
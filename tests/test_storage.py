@@ -0,0 +1,108 @@
+import json, os, time
+from pathlib import Path
+
+import pytest
+
+from database import db, storage
+
+OLD = time.time() - 2 * storage.GC_GRACE_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def tmp_store(tmp_path, monkeypatch):
+    # every path in db/storage is relative, so a chdir isolates the DB and both folders
+    monkeypatch.chdir(tmp_path)
+    db.init_db()
+    return tmp_path
+
+
+def make_file(path, data=b"x" * 100, mtime=OLD):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def add_row(file_id, path, checksum="c" * 64, result_path=None):
+    db.create_batch(f"batch-{file_id}", 1)
+    db.add_file(file_id, f"batch-{file_id}", Path(path).name, str(path), checksum)
+    if result_path:
+        db.set_file_done(file_id, str(result_path))
+
+
+def test_referenced_upload_and_result_are_kept():
+    up = make_file(storage.blob_path("a" * 64, "cv.pdf"))
+    res = storage.write_result_json("f1", {"name": "A"})
+    os.utime(res, (OLD, OLD))
+    add_row("f1", up, "a" * 64, res)
+
+    report = storage.run_maintenance()
+
+    assert up.exists() and res.exists()
+    assert report["orphans_removed"] == 0
+
+
+def test_old_orphan_is_deleted_and_young_orphan_is_kept():
+    old = make_file("uploads/batch/old.pdf")
+    old_res = make_file("results/gone.json", b'{"a": 1}')
+    young = make_file("uploads/batch/young.pdf", mtime=time.time())
+
+    report = storage.run_maintenance()
+
+    assert not old.exists() and not old_res.exists()
+    assert not (storage.RESULTS_DIR / "gone.json.gz").exists()
+    assert young.exists()
+    assert report["orphans_removed"] == 2
+
+
+def test_error_json_for_live_id_is_kept():
+    add_row("f1", storage.blob_path("a" * 64, "cv.pdf"), "a" * 64)
+    err = make_file("results/f1_error.json", b'{"error": "boom"}')
+    stray = make_file("results/f2_error.json", b'{"error": "boom"}')
+
+    storage.run_maintenance()
+
+    assert err.exists()
+    assert not stray.exists()
+
+
+def test_same_checksum_rows_share_one_blob():
+    # the first row's legacy file is already gone; it must still be repointed
+    add_row("f1", "uploads\\b0\\f1_cv.pdf", "d" * 64)
+    make_file("uploads/b1/f2_cv.pdf", b"same")
+    make_file("uploads/b1/f3_cv.pdf", b"same")
+    add_row("f2", "uploads/b1/f2_cv.pdf", "d" * 64)
+    add_row("f3", "uploads/b1/f3_cv.pdf", "d" * 64)
+
+    storage.run_maintenance()
+
+    blob = storage.blob_path("d" * 64, "cv.pdf")
+    assert blob.read_bytes() == b"same"
+    assert {r["path"] for r in db.get_file_refs()} == {str(blob)}
+    assert not Path("uploads/b1").exists()
+    assert [p for p in Path("uploads").rglob("*") if p.is_file()] == [blob]
+
+
+def test_dry_run_changes_nothing_and_matches_real_run():
+    make_file("uploads/b1/f1_cv.pdf", b"same" * 50)
+    make_file("uploads/b1/f2_cv.pdf", b"same" * 50)
+    add_row("f1", "uploads/b1/f1_cv.pdf", "e" * 64, "results/f1.json")
+    add_row("f2", "uploads/b1/f2_cv.pdf", "e" * 64)
+    make_file("results/f1.json", json.dumps({"resume_data": "text " * 500}, indent=2).encode())
+    make_file("results/orphan.json", b'{"a": 1}')
+    make_file("uploads/b2/orphan.pdf")
+
+    def snapshot():
+        files = {str(p): p.read_bytes() for p in Path(".").rglob("*") if p.is_file() and p.suffix != ".db"}
+        return files, db.get_file_refs()
+
+    before = snapshot()
+    dry = storage.run_maintenance(dry_run=True)
+    assert snapshot() == before
+
+    real = storage.run_maintenance()
+    assert dry["bytes_reclaimed"] == real["bytes_reclaimed"] > 0
+    assert dry["orphans_removed"] == real["orphans_removed"]
+    assert dry["uploads_deduplicated"] == real["uploads_deduplicated"] == 2
+    assert dry["results_compacted"] == real["results_compacted"] == 1